@@ -1,5 +1,7 @@
+from .bspline_mutual_information import MutualInformationEstimator
 from .bspline_mutual_information import bspline_bin
 from .bspline_mutual_information import mutual_information
+from .bspline_mutual_information import mutual_information_matrix
 from .bspline_mutual_information import normalized_mutual_information
 
 from ._version import __version__
\ No newline at end of file
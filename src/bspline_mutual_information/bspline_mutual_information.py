@@ -17,18 +17,55 @@ References
     PMCID: PMC516800.
 """
 
-from typing import Optional
+from collections import OrderedDict
 from typing import Literal
+import functools
 import warnings
 
 import numpy as np
 from numpy.typing import ArrayLike
-from scipy.interpolate import BSpline
+from scipy import sparse
+
+# numba is an optional dependency (install via
+# 'bspline-mutual-information[numba]'); if it is available the design
+# matrix construction runs as a JIT compiled parallel kernel, otherwise
+# a vectorized NumPy implementation is used
+try:
+    from numba import njit
+    from numba import prange
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+# 1 / ln(2); scaling the natural log by this constant yields log2 while
+# avoiding libm's log2, which is slower than log on many platforms
+_INV_LN2 = 1.4426950408889634
+
+# once a joint probability table outgrows this size (a conservative L2
+# cache estimate) its matrix product is tiled into square panels of
+# _JOINT_BLOCK columns so each output panel stays cache resident
+_L2_SIZE = 256 * 1024
+_JOINT_BLOCK = 64
+
+# bounded LRU cache of sparse bin associations, keyed on the raw bytes
+# of the data together with 'bins' and 'order'. Repeated binning of the
+# same array - e.g. comparing one anchor variable against many others,
+# or sweeping 'bins' / 'order' over a fixed dataset - then reuses the
+# Cox-de Boor evaluation instead of recomputing it
+_BSPLINE_BIN_CACHE_MAXSIZE = 128
+_bspline_bin_cache = OrderedDict()
+
+
+def _bspline_bin_cache_clear():
+    """Empties the bin association cache used by :func:`bspline_bin`."""
+    _bspline_bin_cache.clear()
+
 
 def bspline_bin(
         data: ArrayLike,
         bins: int=10,
-        order: int=1
+        order: int=1,
+        dtype: type=np.float64
         ) -> np.ndarray:
     """
     This function enables adaptive binning of continous variables into
@@ -52,13 +89,26 @@ def bspline_bin(
         spline order of 3 will assign the data value up to 3 bins with 
         respective weights as determined by the indicator function. Note
         that :math:`order = degree + 1`.
+    dtype : type, default = numpy.float64
+        Floating point dtype of the returned design matrix. Passing
+        `numpy.float32` halves the memory traffic of downstream matrix
+        products at the cost of single precision weights.
 
     Returns
     -------
     design_matrix : numpy.ndarray
-        A matrix of size [n, b] where n is the number of values in / 
+        A matrix of size [n, b] where n is the number of values in /
         size of ``data`` and b is the number of ``bins``.
 
+    Notes
+    -----
+    The underlying bin associations are memoized in a bounded
+    least-recently-used cache keyed on the raw bytes of ``data``
+    together with ``bins`` and ``order``, so repeatedly binning the
+    same array (e.g. comparing one variable against many others) reuses
+    the previous evaluation. The cache can be emptied with
+    ``bspline_bin.cache_clear()``.
+
     Example
     -------
     >>> from bspline_mutual_information import bspline_bin
@@ -80,39 +130,32 @@ def bspline_bin(
         PMCID: PMC516800.
 
     """
-    try:
-        data = np.array(data, dtype=float)
-    except ValueError as e:
-        raise e
+    data = np.array(data, dtype=float)
 
     if data.ndim != 1:
         raise ValueError(
             f"'data' has {data.ndim} dimensions. 1-D array expected."
         )
 
-    degree = order - 1 # BSpline.design_matrix uses degree as argument
-    knots = range(0, (bins + order), 1)
-    
-    # bspline_min & bspline_max are needed for the transformation of the
-    # data values into the domain of B-Spline functions
-    bspline_min = knots[degree]
-    bspline_max = knots[bins]
-    data_t = _transform_data(
-        data=data,
-        bspline_min=bspline_min,
-        bspline_max=bspline_max
+    first_bin, weights = _bspline_bin_sparse(
+        data, bins=bins, order=order, dtype=dtype
         )
 
-    # the design matrix of a B-Spline that can be generated by defining
-    # values at which the BSpline functions should be evaluated as well 
-    # as the knots and the degree (order - 1) will yield the weighted 
-    # bin associations that we are looking for
-    design_matrix = BSpline.design_matrix(
-        data_t, knots, degree).toarray()
+    # scatter the per-value weights into the dense design matrix; each
+    # value is associated with 'order' consecutive bins starting at its
+    # first bin index
+    n = data.shape[0]
+    design_matrix = np.zeros((n, bins), dtype=dtype)
+    rows = np.arange(n)[:, None]
+    cols = first_bin[:, None] + np.arange(order)
+    design_matrix[rows, cols] = weights
 
     return design_matrix
 
 
+bspline_bin.cache_clear = _bspline_bin_cache_clear
+
+
 def mutual_information(
         x: ArrayLike,
         y: ArrayLike,
@@ -120,7 +163,7 @@ def mutual_information(
         spline_order: int=1,
         correct: bool=False,
         min_def: int=0,
-    ) -> Optional[float]:
+    ) -> float:
     """
     Estimates Mutual Information between two arrays containing continous
     variables. Uses Daub et.al's approach [1]_ to estimate Mutual 
@@ -151,12 +194,14 @@ def mutual_information(
         that ``x`` and ``y`` must both be defined at, i.e. both values 
         at ``x[i]`` and ``y[i]`` must not be NaN. If less than 
         ``min_def`` positions are defined the return value ``mi`` will 
-        be `None`.
+        be `numpy.nan`.
 
     Returns
     -------
     mi : float
-        Mutual Information estimate for ``x`` and ``y``
+        Mutual Information estimate for ``x`` and ``y``; `numpy.nan` if
+        the estimate is undefined (fewer than ``min_def`` defined
+        positions, or one of the arrays contains only identical values)
 
     Raises
     ------
@@ -176,16 +221,16 @@ def mutual_information(
     >>> x = [1,2,3,4,5]
     >>> y = [1,2,1,2,3]
     >>> mutual_information(x, y, bins=5, spline_order=3)
-    0.4740122135541802
+    0.47401221355418066
 
-    If ``min_def`` is defined and less than ``min_def`` positions in 
-    both ``x`` and ``y`` are defined the return value will be `None`
+    If ``min_def`` is defined and less than ``min_def`` positions in
+    both ``x`` and ``y`` are defined the return value will be
+    `numpy.nan`
 
     >>> x = [1,2,np.nan,4,np.nan]
     >>> y = [1,2,1,None,5]
-    >>> mi = mutual_information(x, y, bins=5, spline_order=3, min_def=3)
-    >>> type(mi)
-    NoneType 
+    >>> mutual_information(x, y, bins=5, spline_order=3, min_def=3)
+    nan
 
     References
     ----------
@@ -208,8 +253,8 @@ def mutual_information(
             )
     except ValueError as e:
         raise e
-    
-    return vals.get("mi", None)
+
+    return vals["mi"]
 
 
 def normalized_mutual_information(
@@ -223,7 +268,7 @@ def normalized_mutual_information(
             'min', 'max', 'geometric', 'arithmetic',
             'symmetric_uncertainty', 'joint'
         ]='arithmetic',
-    ) -> Optional[float]:
+    ) -> float:
     """
     Estimates Normalized Mutual Information between two arrays 
     containing continous variables.
@@ -266,7 +311,7 @@ def normalized_mutual_information(
         that ``x`` and ``y`` must both be defined at, i.e. both values 
         at ``x[i]`` and ``y[i]`` must not be NaN. If less than 
         ``min_def`` positions are defined the return value ``mi`` will 
-        be `None`.
+        be `numpy.nan`.
     normalization_method: {"min", "max", "arithmetic", "geometric", \
                             "symmetric_uncertainty", "joint"}, \
                             default = "arithmetic"
@@ -276,7 +321,9 @@ def normalized_mutual_information(
     Returns
     -------
     mi : float
-        Mutual Information estimate for ``x`` and ``y``
+        Mutual Information estimate for ``x`` and ``y``; `numpy.nan` if
+        the estimate is undefined (fewer than ``min_def`` defined
+        positions, or one of the arrays contains only identical values)
     
     Example
     -------
@@ -288,7 +335,7 @@ def normalized_mutual_information(
     >>> x = [1,2,3,4,5]
     >>> y = [1,2,1,2,3]
     >>> normalized_mutual_information(x, y)
-    0.7918756684685216
+    0.7918756684685215
 
     Alternatively, ``normalization_method`` can be defined as ``min``,
     ``max`` or ``geometric``. Below is an example call that sets the 
@@ -303,7 +350,7 @@ def normalized_mutual_information(
     ...     normalization_method="geometric"
     ... )
     ...
-    0.8096040720878853  
+    0.8096040720878851
 
     Additionally, just like in ``mutual_information`` we can define the 
     ``spline_order`` and number of ``bins``:
@@ -311,7 +358,7 @@ def normalized_mutual_information(
     >>> x = [1,2,3,4,5]
     >>> y = [1,2,1,2,3]
     >>> normalized_mutual_information(x, y, bins=5, spline_order=3)
-    0.21375466439357388
+    0.21375466439357407
     
     Raises
     ------
@@ -350,14 +397,12 @@ def normalized_mutual_information(
     except ValueError as e:
         raise e
 
-    mi = vals.get("mi", None)
-    h_x = vals.get("h_x", None)
-    h_y = vals.get("h_y", None)
-    h_x_y = vals.get("h_x_y", None)
+    mi = vals["mi"]
+    h_x = vals["h_x"]
+    h_y = vals["h_y"]
+    h_x_y = vals["h_x_y"]
 
-    if mi is None:
-        pass
-    elif mi == 0.0:
+    if np.isnan(mi) or mi == 0.0:
         pass
     else:
         normalization_denominator = _normalize(
@@ -371,6 +416,393 @@ def normalized_mutual_information(
     return float(mi)
 
 
+class MutualInformationEstimator:
+    """
+    Reusable Mutual Information estimator for tight pairwise scan
+    loops.
+
+    :func:`mutual_information` allocates the [bins, bins] joint
+    probability table and the two marginal probability vectors on every
+    call. For one-off estimates this is irrelevant, but in loops over
+    many pairs the repeated allocations add up. This class preallocates
+    those buffers once for a fixed configuration and reuses them on
+    every :meth:`compute` call, writing the joint product in place.
+
+    Parameters
+    ----------
+    bins : int, default = 10
+        Number of bins to use for the B-Spline based binnig of the
+        continous values in ``x`` and ``y``.
+    spline_order : int, default = 1
+        Spline order for the generation of B-Spline functions that are
+        used to extract bin associations. See
+        :func:`mutual_information`.
+    correct : bool, default = False
+        Defines whether correction for the finite size effect should be
+        performed. Only available if ``spline_order == 1``.
+    min_def : int, default = 0
+        Optional value that defines the minimal number of position i
+        that ``x`` and ``y`` must both be defined at. If less than
+        ``min_def`` positions are defined :meth:`compute` will return
+        `numpy.nan`.
+    dtype : type, default = numpy.float64
+        Floating point dtype of the bin association matrices and the
+        probability buffers. `numpy.float32` halves the memory traffic
+        of the joint matrix product; the entropy reductions always run
+        in double precision, so estimates typically agree to ~6
+        significant digits with the `numpy.float64` default.
+
+    Raises
+    ------
+    ValueError
+        If finite size effect correction is set to True
+        (``correct==True``), but the spline order is > 1
+        (``spline_order != 1``).
+
+    Example
+    -------
+    >>> from bspline_mutual_information import MutualInformationEstimator
+    >>> estimator = MutualInformationEstimator(bins=5, spline_order=3)
+    >>> estimator.compute([1,2,3,4,5], [1,2,1,2,3])
+    0.47401221355418066
+    """
+
+    def __init__(
+            self,
+            bins: int=10,
+            spline_order: int=1,
+            correct: bool=False,
+            min_def: int=0,
+            dtype: type=np.float64,
+            ):
+        if spline_order > 1 and correct == True:
+            raise ValueError(
+                "The correction for the finite size effect is "
+                "only available for 'spline_order = 1'"
+                )
+
+        self.bins = bins
+        self.spline_order = spline_order
+        self.correct = correct
+        self.min_def = min_def
+        self.dtype = np.dtype(dtype)
+
+        # working buffers reused across compute() calls
+        self._joint = np.empty((bins, bins), dtype=self.dtype)
+        self._p_x = np.empty(bins, dtype=self.dtype)
+        self._p_y = np.empty(bins, dtype=self.dtype)
+
+    def compute(self, x: ArrayLike, y: ArrayLike) -> float:
+        """
+        Estimates Mutual Information between ``x`` and ``y`` using the
+        preallocated buffers of this estimator.
+
+        Parameters
+        ----------
+        x : ArrayLike
+            1-dimensional array like object containing values
+        y : ArrayLike
+            1-dimensional array like object containing values
+
+        Returns
+        -------
+        mi : float
+            Mutual Information estimate for ``x`` and ``y``;
+            `numpy.nan` if the estimate is undefined (see
+            :func:`mutual_information`)
+
+        Raises
+        ------
+        ValueError
+            If ``x`` or ``y`` can not be converted to an array
+            containing ``float`` or has more than 1 dimension.
+        """
+        x = np.array(x, dtype=float)
+        y = np.array(y, dtype=float)
+
+        if x.ndim != 1:
+            raise ValueError(
+                f"'x' has {x.ndim} dimensions. 1-D array expected."
+            )
+        if y.ndim != 1:
+            raise ValueError(
+                f"'y' has {y.ndim} dimensions. 1-D array expected."
+            )
+
+        n_total = len(x)
+        xy_defined = ~(np.isnan(x) | np.isnan(y))
+        n_defined = int(xy_defined.sum())
+        if n_defined < len(x):
+            x = x[xy_defined]
+            y = y[xy_defined]
+
+        if n_defined < self.min_def:
+            return np.nan
+
+        try:
+            x_bin_associations = bspline_bin(
+                data=x,
+                bins=self.bins,
+                order=self.spline_order,
+                dtype=self.dtype
+            )
+            y_bin_associations = bspline_bin(
+                data=y,
+                bins=self.bins,
+                order=self.spline_order,
+                dtype=self.dtype
+            )
+        except ValueError:
+            return np.nan
+
+        # marginal and joint probabilities accumulated into the
+        # preallocated buffers
+        np.sum(x_bin_associations, axis=0, out=self._p_x)
+        self._p_x /= n_defined
+        np.sum(y_bin_associations, axis=0, out=self._p_y)
+        self._p_y /= n_defined
+        _joint_product(
+            x_bin_associations,
+            y_bin_associations,
+            out=self._joint
+        )
+        self._joint /= n_total
+
+        mi = float(
+            _entropy(self._p_x)
+            + _entropy(self._p_y)
+            - _entropy(self._joint)
+        )
+
+        # correction for the finite size effect
+        if self.correct == True:
+            mi = mi - (self.bins - 1) / (2 * n_defined)
+
+        return mi
+
+
+def mutual_information_matrix(
+        data: ArrayLike,
+        bins: int=10,
+        spline_order: int=1,
+        correct: bool=False,
+    ) -> np.ndarray:
+    """
+    Estimates Mutual Information between all pairs of columns of a data
+    matrix containing continous variables.
+
+    Uses Daub et.al's approach [1]_ to estimate Mutual Information
+    using B-Spline functions, just like :func:`mutual_information`, but
+    computes all pairwise estimates in bulk instead of requiring a
+    Python loop over column pairs. The bin associations and marginal
+    entropies of each column are computed only once and the joint
+    probability tables of all pairs are obtained through batched matrix
+    products, which is substantially faster than calling
+    :func:`mutual_information` for each of the :math:`F^2` pairs.
+
+    Parameters
+    ----------
+    data : ArrayLike
+        2-dimensional array like object of shape [n, F] whose F columns
+        contain the variables to compare. NaN values are allowed; pairs
+        involving a column with missing values are estimated on the
+        positions where both columns are defined.
+    bins : int, default = 10
+        Number of bins to use for the B-Spline based binnig of the
+        continous values in the columns of ``data``.
+    spline_order : int, default = 1
+        Spline order for the generation of B-Spline functions that are
+        used to extract bin associations. ``spline_order = 1`` will
+        result in basic binning. Higher values of ``spline_order`` will
+        assign the data values up to the corresponding number of bins
+        with respective weights as determined by the indicator function.
+    correct : bool, default = False
+        Defines whether correction for the finite size effect should be
+        performed. Only available if ``spline_order == 1``.
+
+    Returns
+    -------
+    mi_matrix : numpy.ndarray
+        Symmetric matrix of size [F, F] where entry [i, j] is the
+        Mutual Information estimate between column i and column j of
+        ``data``. Pairs involving a column that can not be binned (e.g.
+        all jointly defined values identical) are set to `numpy.nan`,
+        mirroring the `numpy.nan` return value of
+        :func:`mutual_information`.
+
+    Raises
+    ------
+    ValueError
+        If finite size effect correction is set to True
+        (``correct==True``), but the spline order is > 1
+        (``spline_order != 1``).
+    ValueError
+        If ``data`` can not be converted to an array containing
+        ``float``.
+    ValueError
+        If ``data`` does not have exactly 2 dimensions.
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> from bspline_mutual_information import mutual_information_matrix
+    >>> X = np.transpose(np.array([[1,2,3,4,5], [1,2,1,2,3]]))
+    >>> mutual_information_matrix(X, bins=5, spline_order=3)
+    array([[0.7866756 , 0.47401221],
+           [0.47401221, 0.94807651]])
+
+    References
+    ----------
+    .. [1] Daub CO, Steuer R, Selbig J, Kloska S. Estimating mutual
+        information using B-spline functions--an improved similarity
+        measure for analysing gene expression data. BMC Bioinformatics.
+        2004 Aug 31;5:118. doi: `10.1186/1471-2105-5-118
+        <https://doi.org/10.1186/1471-2105-5-118>`. PMID: 15339346;
+        PMCID: PMC516800.
+    """
+    if spline_order > 1 and correct == True:
+        raise ValueError(
+            "The correction for the finite size effect is "
+            "only available for 'spline_order = 1'"
+            )
+
+    data = np.array(data, dtype=float)
+
+    if data.ndim != 2:
+        raise ValueError(
+            f"'data' has {data.ndim} dimensions. 2-D array expected."
+        )
+
+    n, n_features = data.shape
+
+    # one NaN pass over the whole matrix instead of two per column pair;
+    # columns without missing values can go through the bulk path below
+    defined = ~np.isnan(data)
+    fully_defined = defined.all(axis=0)
+
+    mi_matrix = np.full((n_features, n_features), np.nan)
+
+    # all pairs of fully defined columns are computed in one shot via
+    # batched matrix products
+    bulk_idx = np.flatnonzero(fully_defined)
+    if bulk_idx.size > 0:
+        mi_matrix[np.ix_(bulk_idx, bulk_idx)] = _pairwise_mi_bulk(
+            data=data[:, bulk_idx],
+            bins=bins,
+            spline_order=spline_order,
+            correct=correct
+        )
+
+    # pairs involving a column with missing values fall back to the
+    # pairwise backend; the precomputed mask columns route the pairs
+    # and skip those without any jointly defined position. The backend
+    # receives the unfiltered columns, since its joint normalization is
+    # tied to the original column length - this keeps the fallback
+    # identical to calling mutual_information on the same columns
+    if bulk_idx.size < n_features:
+        for i in range(n_features):
+            for j in range(i, n_features):
+                if fully_defined[i] and fully_defined[j]:
+                    continue
+                pair_defined = defined[:, i] & defined[:, j]
+                if not pair_defined.any():
+                    continue
+                vals = _mutual_information_backend(
+                    x=data[:, i],
+                    y=data[:, j],
+                    bins=bins,
+                    spline_order=spline_order,
+                    correct=correct
+                )
+                mi = vals["mi"]
+                mi_matrix[i, j] = mi
+                mi_matrix[j, i] = mi
+
+    return mi_matrix
+
+
+def _pairwise_mi_bulk(
+        data: np.ndarray,
+        bins: int,
+        spline_order: int,
+        correct: bool
+        ) -> np.ndarray:
+    """
+    Internal helper function behind :func:`mutual_information_matrix`
+    that computes the Mutual Information of all column pairs of a fully
+    defined (NaN free) data matrix through batched matrix products.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        2-dimensional array of size [n, F] without missing values
+    bins : int
+        Number of bins to use for the B-Spline based binning
+    spline_order : int
+        Spline order of the B-spline functions
+    correct : bool
+        Defines whether correction for the finite size effect should be
+        performed
+
+    Returns
+    -------
+    mi_matrix : numpy.ndarray
+        Symmetric matrix of size [F, F] of Mutual Information
+        estimates; pairs involving a column that can not be binned are
+        set to `numpy.nan`
+    """
+    n, n_features = data.shape
+
+    # bin associations of every column are computed exactly once;
+    # columns that can not be binned (identical values) are marked and
+    # yield NaN estimates instead of aborting the whole matrix
+    bin_associations = np.zeros((n_features, n, bins))
+    binnable = np.ones(n_features, dtype=bool)
+    for f in range(n_features):
+        try:
+            bin_associations[f] = bspline_bin(
+                data=data[:, f],
+                bins=bins,
+                order=spline_order
+            )
+        except ValueError:
+            binnable[f] = False
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+
+        # marginal probabilities and entropies, one row per column
+        p = np.sum(bin_associations, axis=1) / n
+        h = -_INV_LN2 * np.nansum(p * np.log(p), axis=1)
+
+        # joint entropies of all pairs via batched matrix products; the
+        # pair axis is blocked so that the [block, F, bins, bins] joint
+        # probability tensor stays within a bounded amount of memory
+        h_joint = np.empty((n_features, n_features))
+        block = max(1, 2**27 // max(1, n_features * bins * bins * 8))
+        for f0 in range(0, n_features, block):
+            f1 = min(f0 + block, n_features)
+            p_joint = np.einsum(
+                'inb,jnc->ijbc',
+                bin_associations[f0:f1],
+                bin_associations
+            ) / n
+            h_joint[f0:f1] = -_INV_LN2 * np.nansum(
+                p_joint * np.log(p_joint), axis=(2, 3)
+            )
+
+    mi_matrix = h[:, None] + h[None, :] - h_joint
+
+    # correction for the finite size effect
+    if correct == True:
+        mi_matrix = mi_matrix - (bins - 1) / (2 * n)
+
+    mi_matrix[~binnable, :] = np.nan
+    mi_matrix[:, ~binnable] = np.nan
+
+    return mi_matrix
+
+
 def _mutual_information_backend(
         x: ArrayLike,
         y: ArrayLike,
@@ -408,7 +840,7 @@ def _mutual_information_backend(
         that ``x`` and ``y`` must both be defined at, i.e. both values 
         at ``x[i]`` and ``y[i]`` must not be NaN. If less than 
         ``min_def`` positions are defined the return value ``mi`` will 
-        be `None`.
+        be `numpy.nan`.
 
     Returns
     -------
@@ -463,25 +895,34 @@ def _mutual_information_backend(
 
     # checking / filtering x & y to positions where both of the arrays
     # contain values that are defined (not NaN)
-    xy_defined = np.where(~np.isnan(x) & ~np.isnan(y))
-    x_defined_vals = x[xy_defined]
-    y_defined_vals = y[xy_defined]
+    xy_defined = ~(np.isnan(x) | np.isnan(y))
+    n_defined = int(xy_defined.sum())
+    if n_defined == len(x):
+        # common case: nothing to filter, skip the fancy-index gather
+        x_defined_vals = x
+        y_defined_vals = y
+    else:
+        x_defined_vals = x[xy_defined]
+        y_defined_vals = y[xy_defined]
 
     # min_def can be used as "reliability check" to not calculate mutual
-    # information between two vectors with too little overlap
-    if(len(xy_defined)/len(x) < min_def):
-        mi = None
-        h_x = None
-        h_y = None
-        h_x_y = None
+    # information between two vectors with too little overlap. Note
+    # that the previous formulation compared len() of the np.where
+    # result tuple (always 1) against min_def, which effectively
+    # disabled the check
+    if(n_defined < min_def):
+        mi = np.nan
+        h_x = np.nan
+        h_y = np.nan
+        h_x_y = np.nan
     else:
         try:
-            x_bin_associations = bspline_bin(
+            x_first_bin, x_weights = _bspline_bin_sparse(
                 data=x_defined_vals,
                 bins=bins,
                 order=spline_order
             )
-            y_bin_associations = bspline_bin(
+            y_first_bin, y_weights = _bspline_bin_sparse(
                 data=y_defined_vals,
                 bins=bins,
                 order=spline_order
@@ -499,36 +940,73 @@ def _mutual_information_backend(
             # spline_order == bins, which for all intents and purposes
             # is unlikely to happen.
             # To compensate for this edge case we define the mutual
-            # information to be 'None' if one of the two arrays contains
-            # only indentical values.  
-            mi = None
-            return {"mi": mi, "h_x": None, "h_y": None, "h_x_y": None}
+            # information to be NaN if one of the two arrays contains
+            # only indentical values.
+            return {
+                "mi": np.nan,
+                "h_x": np.nan,
+                "h_y": np.nan,
+                "h_x_y": np.nan
+                }
         
-        # calculation of probabilities x[i] and y[i] based of the bin(i) 
-        # association probabilities as determined by the B-Spline
-        # functions
-        p_x = np.sum(x_bin_associations, axis=0) / len(x_defined_vals)
-        p_y = np.sum(y_bin_associations, axis=0) / len(y_defined_vals)
-        p_x_y = (
-            np.matmul(
-                np.transpose(x_bin_associations),
-                y_bin_associations
+        if spline_order == 1:
+            # spline order 1 is plain binning: every value carries a
+            # single weight of exactly 1, so the probabilities are
+            # integer histograms and neither weight arrays nor sparse
+            # matrix products are needed
+            p_x = np.bincount(x_first_bin, minlength=bins) / n_defined
+            p_y = np.bincount(y_first_bin, minlength=bins) / n_defined
+            p_x_y = (
+                np.bincount(
+                    x_first_bin * bins + y_first_bin,
+                    minlength=bins * bins
                 ) / len(x)
-            ).flatten('F') 
+            ).reshape(bins, bins)
+        else:
+            # each value is associated with 'spline_order' consecutive
+            # bins; expand the first-bin indices into the full column
+            # indices of the sparse design matrices
+            bin_offsets = np.arange(spline_order)
+            x_bin_idx = (x_first_bin[:, None] + bin_offsets).ravel()
+            y_bin_idx = (y_first_bin[:, None] + bin_offsets).ravel()
+
+            # calculation of probabilities x[i] and y[i] based of the
+            # bin(i) association probabilities as determined by the
+            # B-Spline functions, accumulated directly from the sparse
+            # representation
+            p_x = np.bincount(
+                x_bin_idx, weights=x_weights.ravel(), minlength=bins
+                ) / n_defined
+            p_y = np.bincount(
+                y_bin_idx, weights=y_weights.ravel(), minlength=bins
+                ) / n_defined
+
+            # the joint probabilities follow from the product of the
+            # two design matrices; since each row holds at most
+            # 'spline_order' non-zeros a sparse (CSR) product takes
+            # O(n * spline_order^2) operations instead of the
+            # O(n * bins^2) of a dense matmul
+            indptr = np.arange(n_defined + 1) * spline_order
+            x_csr = sparse.csr_matrix(
+                (x_weights.ravel(), x_bin_idx, indptr),
+                shape=(n_defined, bins)
+            )
+            y_csr = sparse.csr_matrix(
+                (y_weights.ravel(), y_bin_idx, indptr),
+                shape=(n_defined, bins)
+            )
+            # the entropy reduction below is order-independent, so the
+            # [bins, bins] joint table is kept 2-dimensional and
+            # normalized in place instead of flattening it into a new
+            # copy
+            p_x_y = (x_csr.T @ y_csr).toarray()
+            p_x_y /= len(x)
         
-        # In certain circumstances the algorithm can produce divisions
-        # by zero in in the calculation of the entropies. In those cases
-        # numpy raises warnings. The result is that those instances
-        # generate NaNs. Those generated NaNs are removed in the 
-        # summation (using np.nansum). The with-statement catches those
-        # warnings and supresses them.
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            # calculation of the Shannon entropy H(A) where A = x & y
-            h_x = -np.nansum(p_x * np.log2(p_x))
-            h_y = -np.nansum(p_y * np.log2(p_y))
-            # calculation of the joint entropy H(A,B)
-            h_x_y = -np.nansum(p_x_y * np.log2(p_x_y))
+        # calculation of the Shannon entropy H(A) where A = x & y
+        h_x = _entropy(p_x)
+        h_y = _entropy(p_y)
+        # calculation of the joint entropy H(A,B)
+        h_x_y = _entropy(p_x_y)
 
         # mutual information based on calculated entropies
         mi = float(h_x + h_y - h_x_y)
@@ -567,6 +1045,276 @@ def _normalize(h_x, h_y, h_x_y, normalization_method):
         )
 
 
+def _joint_product(
+        x_bin: np.ndarray,
+        y_bin: np.ndarray,
+        out: np.ndarray
+        ) -> np.ndarray:
+    """
+    Internal helper function that computes the joint count matrix
+    ``x_bin.T @ y_bin`` into the preallocated ``out`` array.
+
+    Small joint tables are computed with a single matrix product. Once
+    the [bins, bins] table exceeds the typical L2 cache size the
+    product is tiled into panels of at most ``_JOINT_BLOCK`` columns
+    per side, so every output panel (and the slices of the operands
+    feeding it) stays cache resident while it is accumulated.
+
+    Parameters
+    ----------
+    x_bin : numpy.ndarray
+        Bin association matrix of size [n, bins]
+    y_bin : numpy.ndarray
+        Bin association matrix of size [n, bins]
+    out : numpy.ndarray
+        Preallocated output array of size [bins, bins]
+
+    Returns
+    -------
+    out : numpy.ndarray
+        The ``out`` array containing the joint counts
+    """
+    bins = out.shape[0]
+    if bins * bins * out.itemsize <= _L2_SIZE:
+        np.matmul(np.transpose(x_bin), y_bin, out=out)
+        return out
+
+    for i0 in range(0, bins, _JOINT_BLOCK):
+        i1 = min(i0 + _JOINT_BLOCK, bins)
+        x_panel_t = np.transpose(x_bin[:, i0:i1])
+        for j0 in range(0, bins, _JOINT_BLOCK):
+            j1 = min(j0 + _JOINT_BLOCK, bins)
+            np.matmul(
+                x_panel_t,
+                y_bin[:, j0:j1],
+                out=out[i0:i1, j0:j1]
+            )
+
+    return out
+
+
+def _entropy(p: np.ndarray) -> float:
+    """
+    Internal helper function that calculates the Shannon entropy (in
+    bits) of an array of probabilities.
+
+    Only the non-zero entries enter the ``log2`` computation. Zero
+    probabilities contribute nothing to the entropy anyway, so this
+    avoids evaluating ``log2`` (one of the more expensive scalar
+    operations) on entries whose result would be discarded, and avoids
+    generating the NaN values that previously had to be suppressed with
+    ``np.nansum`` and a warnings filter. Joint probability arrays from
+    low spline orders are mostly zeros, so this typically reduces the
+    number of ``log2`` evaluations substantially.
+
+    Parameters
+    ----------
+    p : numpy.ndarray
+        Array of probabilities; may be of any shape
+
+    Returns
+    -------
+    float
+        Shannon entropy of the non-zero entries of ``p``
+    """
+    # the final log reduction always runs in double precision, even if
+    # the probabilities were accumulated in a narrower dtype
+    p_nonzero = p[p > 0].astype(np.float64, copy=False)
+
+    return -_INV_LN2 * np.dot(p_nonzero, np.log(p_nonzero))
+
+
+def _bspline_bin_sparse(
+        data: np.ndarray,
+        bins: int,
+        order: int,
+        dtype: type=np.float64
+        ) -> tuple:
+    """
+    Internal counterpart of :func:`bspline_bin` that returns the bin
+    associations in sparse form.
+
+    Every value is associated with exactly ``order`` consecutive bins,
+    so each row of the design matrix is fully described by the index of
+    its first non-zero bin and the ``order`` weights. Callers that only
+    need the bin associations for probability accumulation (such as
+    :func:`_mutual_information_backend`) can work with this compact
+    representation directly and skip the dense [n, bins] matrix.
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+        1-dimensional array containing the values to be binned
+    bins : int
+        Number of bins that the values should be binned into
+    order : int
+        Spline order of the B-spline functions
+    dtype : type, default = numpy.float64
+        Floating point dtype of the returned weights
+
+    Returns
+    -------
+    first_bin : numpy.ndarray
+        Integer array of size [n] containing the index of the first bin
+        each value is associated with
+    weights : numpy.ndarray
+        Array of size [n, order] where row r contains the weights of
+        the bins ``first_bin[r], ..., first_bin[r] + order - 1``. The
+        returned arrays may be shared with the cache and are marked
+        read-only.
+    """
+    dtype = np.dtype(dtype)
+    cache_key = (data.tobytes(), bins, order, dtype)
+    cached = _bspline_bin_cache.get(cache_key)
+    if cached is not None:
+        _bspline_bin_cache.move_to_end(cache_key)
+        return cached
+
+    degree = order - 1
+
+    # on the uniform knot grid knots = {0, 1, ..., bins + order - 1}
+    # the domain bounds are simply knots[degree] = degree and
+    # knots[bins] = bins, so no knot array needs to be materialized
+    data_t = _transform_data(
+        data=data,
+        bspline_min=float(degree),
+        bspline_max=float(bins)
+        )
+
+    interval, weights = _bin_weights(data_t, bins=bins, order=order)
+    first_bin = interval - degree
+
+    # the recursion always runs in double precision; narrower dtypes
+    # are produced by a single downcast at the end
+    if dtype != np.float64:
+        weights = weights.astype(dtype)
+
+    # cached arrays are shared between callers, so freeze them; evict
+    # the least recently used entry once the cache is full
+    first_bin.setflags(write=False)
+    weights.setflags(write=False)
+    _bspline_bin_cache[cache_key] = (first_bin, weights)
+    if len(_bspline_bin_cache) > _BSPLINE_BIN_CACHE_MAXSIZE:
+        _bspline_bin_cache.popitem(last=False)
+
+    return first_bin, weights
+
+
+def _bin_weights(
+        data_t: np.ndarray,
+        bins: int,
+        order: int
+        ) -> tuple:
+    """
+    Internal helper function that evaluates the B-spline basis functions
+    on the uniform integer knot grid :math:`knots = {0, 1, ..., K - 1},
+    K = bins + order` via a vectorized Cox-de Boor recursion.
+
+    Since the knots are uniform with unit spacing, the Cox-de Boor
+    weights simplify to ``(u + d - m) / d`` and ``(m + 1 - u) / d``
+    where ``u`` is the offset of a value within its knot interval. This
+    allows evaluating all values at once in NumPy (or, if numba is
+    available, in a JIT compiled parallel kernel) instead of going
+    through the row-by-row sparse matrix construction of
+    ``scipy.interpolate.BSpline.design_matrix``.
+
+    Parameters
+    ----------
+    data_t : numpy.ndarray
+        1-dimensional array containing values already transformed into
+        the B-spline domain ``[order - 1, bins]`` (see
+        :func:`_transform_data`)
+    bins : int
+        Number of bins, i.e. number of B-spline basis functions
+    order : int
+        Spline order of the B-spline functions
+
+    Returns
+    -------
+    interval : numpy.ndarray
+        Integer array of size [n] containing the knot interval of each
+        value; the basis functions that are non-zero for a value in
+        knot interval i are the ones with indices i - degree, ..., i
+    weights : numpy.ndarray
+        Array of size [n, order] containing the values of the non-zero
+        basis functions
+    """
+    n = data_t.shape[0]
+    degree = order - 1
+
+    if _HAS_NUMBA:
+        interval = np.empty(n, dtype=np.intp)
+        weights = np.zeros((n, order))
+        _make_bin_weights_kernel(bins, order)(data_t, interval, weights)
+        return interval, weights
+
+    # knot interval that contains each value; the right domain boundary
+    # (data_t == bins) belongs to the last interval
+    interval = np.floor(data_t).astype(np.intp)
+    np.clip(interval, degree, bins - 1, out=interval)
+    u = data_t - interval
+
+    # Cox-de Boor recursion over the 'order' basis functions that are
+    # non-zero on each value's knot interval, performed in place from
+    # the highest index down
+    weights = np.zeros((n, order))
+    weights[:, 0] = 1.0
+    for d in range(1, order):
+        for m in range(d, 0, -1):
+            weights[:, m] = (
+                (u + d - m) / d * weights[:, m - 1]
+                + (m + 1 - u) / d * weights[:, m]
+            )
+        weights[:, 0] *= (1 - u) / d
+
+    return interval, weights
+
+
+if _HAS_NUMBA:
+    @functools.lru_cache(maxsize=32)
+    def _make_bin_weights_kernel(bins, order):
+        """
+        Builds - and caches per process - a JIT compiled kernel behind
+        :func:`_bin_weights` specialized for one ``(bins, order)``
+        configuration.
+
+        ``bins``, ``order`` and ``degree`` are captured as closure
+        variables and therefore baked into the kernel as compile time
+        constants, so numba can fully unroll the order-many Cox-de Boor
+        iterations and fold the interval clamp bounds instead of
+        carrying them as runtime arguments. The kernel evaluates the
+        recursion row by row in parallel and writes the knot intervals
+        and weights straight into the preallocated output arrays; the
+        arithmetic mirrors the vectorized NumPy fallback exactly so
+        both paths produce identical results.
+        """
+        degree = order - 1
+
+        @njit(parallel=True, cache=True)
+        def _bin_weights_kernel(data_t, interval, weights):
+            n = data_t.shape[0]
+            for r in prange(n):
+                t = data_t[r]
+                i = int(t)
+                if i < degree:
+                    i = degree
+                elif i > bins - 1:
+                    i = bins - 1
+                u = t - i
+                b = weights[r]
+                b[0] = 1.0
+                for d in range(1, order):
+                    for m in range(d, 0, -1):
+                        b[m] = (
+                            (u + d - m) / d * b[m - 1]
+                            + (m + 1 - u) / d * b[m]
+                        )
+                    b[0] *= (1 - u) / d
+                interval[r] = i
+
+        return _bin_weights_kernel
+
+
 def _transform_data(
         data: np.ndarray,
         bspline_min: int,
@@ -594,14 +1342,31 @@ def _transform_data(
     Returns
     -------
     data_t : numpy.ndarray
-        1-dimensional array containing the transformed values of 
+        1-dimensional array containing the transformed values of
         ``data``
+
+    Raises
+    ------
+    ValueError
+        If ``data`` can not be mapped onto the B-spline domain, i.e. if
+        all values in ``data`` are identical or ``data`` contains
+        non-finite values.
     """
-    data_t = (
-        (data - min(data))
-        * (bspline_max - bspline_min)
-        / (max(data) - min(data))
-        + bspline_min
-    )
+    # a single min() and max() reduction each instead of the four
+    # Python-level passes of the previous formulation
+    dmin = data.min()
+    drange = data.max() - dmin
+
+    if not (np.isfinite(drange) and drange > 0):
+        # drange == 0 happens if all values in 'data' are identical;
+        # a non-finite drange happens if 'data' itself contains NaN or
+        # infinite values
+        raise ValueError(
+            "'data' could not be mapped onto the B-spline domain. Check "
+            "that 'data' contains finite and non-identical values."
+        )
+
+    scale = (bspline_max - bspline_min) / drange
+    data_t = (data - dmin) * scale + bspline_min
 
     return data_t